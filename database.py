@@ -1,10 +1,25 @@
 import sqlite3
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Float
+from sqlalchemy import (
+    create_engine, event, inspect, bindparam, func, select, delete,
+    Column, Integer, String, DateTime, Float, Index, PrimaryKeyConstraint
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
 import os
 import logging
+import itertools
+import threading
+
+try:
+    import aiosqlite
+    from aiosqlitepool import SQLiteConnectionPool
+except ImportError:  # Optional: only needed for AsyncDatabase
+    aiosqlite = None
+    SQLiteConnectionPool = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -12,44 +27,343 @@ logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Applied to every new SQLite connection: WAL journaling with relaxed fsync,
+# ~20 MB page cache, in-memory temp tables and 128 MB of memory-mapped I/O.
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=134217728',
+    'PRAGMA foreign_keys=ON',
+)
+
+PREFERENCE_FIELDS = ('default_ticker', 'default_period', 'theme', 'show_ma50', 'show_ma200')
+# Preferences stored in their own column vs. packed as bits of the flags column
+PREFERENCE_COLUMNS = ('default_ticker', 'default_period', 'theme')
+PREFERENCE_FLAGS = {'show_ma50': 1, 'show_ma200': 2}
+DEFAULT_PREFERENCE_FLAGS = 0b11
+
+def utc_now():
+    """UTC timestamp evaluated by SQLite, in a text form DateTime parses.
+    
+    strftime's %f gives 'YYYY-MM-DD HH:MM:SS.SSS' (three fractional digits,
+    where SQLAlchemy writes six) instead of CURRENT_TIMESTAMP's whole seconds.
+    """
+    return func.strftime('%Y-%m-%d %H:%M:%f', 'now')
+
+# Every table is keyed by its natural key and stored WITHOUT ROWID, so rows
+# live directly in the primary-key B-tree instead of a rowid table plus a
+# separate unique index.
 class Watchlist(Base):
     __tablename__ = 'watchlists'
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id', 'ticker'),
+        Index('ix_watchlist_user_added', 'user_id', 'added_at'),
+        {'sqlite_with_rowid': False},
+    )
     
-    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False)
     ticker = Column(String(10), nullable=False)
     added_at = Column(DateTime, default=datetime.utcnow)
 
 class SearchHistory(Base):
     __tablename__ = 'search_history'
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id', 'ticker'),
+        Index('ix_search_user_searched', 'user_id', 'searched_at'),
+        {'sqlite_with_rowid': False},
+    )
     
-    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False)
     ticker = Column(String(10), nullable=False)
     searched_at = Column(DateTime, default=datetime.utcnow)
 
 class UserPreferences(Base):
     __tablename__ = 'user_preferences'
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id'),
+        {'sqlite_with_rowid': False},
+    )
     
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, unique=True, nullable=False)
+    user_id = Column(Integer, nullable=False, autoincrement=False)
     default_ticker = Column(String(10), default='AAPL')
     default_period = Column(String(10), default='1y')
     theme = Column(String(10), default='dark')
-    show_ma50 = Column(Boolean, default=True)
-    show_ma200 = Column(Boolean, default=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Boolean preferences packed into one INTEGER, see PREFERENCE_FLAGS
+    flags = Column(
+        Integer, nullable=False,
+        default=DEFAULT_PREFERENCE_FLAGS, server_default=str(DEFAULT_PREFERENCE_FLAGS)
+    )
+    updated_at = Column(DateTime, server_default=utc_now())
+
+# Bump whenever the table definitions change so existing files get migrated
+SCHEMA_VERSION = 2
+
+SEARCH_HISTORY_LIMIT = 6
+
+# SQL for columns that a rebuild derives from an older schema's columns,
+# keyed by (table, column) and used when the old table lacks the column
+MIGRATED_COLUMNS = {
+    ('user_preferences', 'flags'): (
+        ('show_ma50', 'show_ma200'),
+        'COALESCE(show_ma50, 1) * 1 | COALESCE(show_ma200, 1) * 2',
+    ),
+}
+
+# The render-path reads skip SQLAlchemy and go straight to the DBAPI (see
+# Database._read_rows and AsyncDatabase), so they are kept as plain SQL
+WATCHLIST_SQL = "SELECT ticker FROM watchlists WHERE user_id=? ORDER BY added_at DESC"
+RECENT_SEARCHES_SQL = (
+    "SELECT ticker FROM search_history WHERE user_id=? "
+    f"ORDER BY searched_at DESC LIMIT {SEARCH_HISTORY_LIMIT}"
+)
+PREFERENCES_SQL = f"SELECT {', '.join(PREFERENCE_COLUMNS)}, flags FROM user_preferences WHERE user_id=?"
+
+# The bulk loader also bypasses SQLAlchemy and feeds sqlite3's executemany
+BULK_INSERT_CHUNK_SIZE = 10000
+BULK_SEARCH_HISTORY_SQL = (
+    "INSERT INTO search_history (user_id, ticker, searched_at) VALUES (?, ?, ?) "
+    "ON CONFLICT (user_id, ticker) DO UPDATE SET searched_at=excluded.searched_at "
+    "WHERE excluded.searched_at > search_history.searched_at"
+)
+TRIM_SEARCH_HISTORY_SQL = (
+    "DELETE FROM search_history WHERE user_id=? AND ticker NOT IN ("
+    "SELECT ticker FROM search_history WHERE user_id=? "
+    f"ORDER BY searched_at DESC LIMIT {SEARCH_HISTORY_LIMIT})"
+)
+
+def format_timestamp(value):
+    """Render a datetime, date or ISO 8601 string as SQLAlchemy's DateTime text.
+    
+    Aware datetimes are converted to naive UTC, matching datetime.utcnow().
+    Raises ValueError or TypeError for anything else.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    elif not isinstance(value, datetime):
+        raise TypeError(f"Unsupported timestamp type: {type(value).__name__}")
+    
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+def preferences_from_row(row):
+    """Build the preferences dict from a raw PREFERENCES_SQL row."""
+    *columns, flags = row
+    prefs = dict(zip(PREFERENCE_COLUMNS, columns))
+    for field, flag in PREFERENCE_FLAGS.items():
+        prefs[field] = bool(flags & flag)
+    return {field: prefs[field] for field in PREFERENCE_FIELDS}
+
+def create_sqlite_engine(db_path, query_only, poolclass=QueuePool, **pool_kwargs):
+    """Create a pooled engine whose connections get the tuned PRAGMAs applied."""
+    engine = create_engine(
+        f'sqlite:///{db_path}',
+        echo=False,
+        poolclass=poolclass,
+        connect_args={'check_same_thread': False},
+        **pool_kwargs
+    )
+    
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, connection_record):
+        for pragma in SQLITE_PRAGMAS:
+            dbapi_conn.execute(pragma)
+        dbapi_conn.execute(f"PRAGMA query_only={'true' if query_only else 'false'}")
+    
+    return engine
+
+def ensure_schema(engine):
+    """Create or migrate the schema unless this file is already up to date.
+    
+    The schema version lives in PRAGMA user_version, so a database that was
+    set up by an earlier launch costs a single PRAGMA read instead of the
+    table checks create_all would run. engine must be able to write.
+    """
+    with engine.connect() as conn:
+        version = conn.exec_driver_sql('PRAGMA user_version').scalar()
+    if version == SCHEMA_VERSION:
+        return
+    if version > SCHEMA_VERSION:
+        # Written by a newer release; leave it as is rather than
+        # rebuilding tables this code doesn't know about
+        logger.warning(
+            f"Database schema version {version} is newer than {SCHEMA_VERSION}; "
+            "skipping schema setup"
+        )
+        return
+    
+    _rebuild_tables(engine)
+    Base.metadata.create_all(engine)
+    _ensure_indexes(engine)
+    
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+def _rebuild_tables(engine):
+    """Rebuild tables whose columns differ from the current definitions.
+    
+    Columns that exist in both versions are copied across, new columns
+    listed in MIGRATED_COLUMNS are computed from the old ones, and dropped
+    columns (such as the old surrogate ids) are discarded. Tables that
+    already match are left alone.
+    """
+    with engine.begin() as conn:
+        existing = inspect(conn)
+        legacy_tables = [
+            table for table in Base.metadata.sorted_tables
+            if existing.has_table(table.name)
+            and {column['name'] for column in existing.get_columns(table.name)}
+            != {column.name for column in table.columns}
+        ]
+        if not legacy_tables:
+            return
+        
+        # pysqlite doesn't open a transaction for DDL on its own; without
+        # this an interrupted migration could leave a table renamed away
+        conn.exec_driver_sql('BEGIN')
+        for table in legacy_tables:
+            legacy_columns = {column['name'] for column in existing.get_columns(table.name)}
+            # Old index names would clash with the rebuilt table's indexes
+            for index in existing.get_indexes(table.name):
+                conn.exec_driver_sql(f'DROP INDEX IF EXISTS {index["name"]}')
+            
+            legacy = f'{table.name}_legacy'
+            conn.exec_driver_sql(f'ALTER TABLE {table.name} RENAME TO {legacy}')
+            table.create(conn)
+            targets, sources = [], []
+            for column in table.columns:
+                if column.name in legacy_columns:
+                    targets.append(column.name)
+                    sources.append(column.name)
+                elif (table.name, column.name) in MIGRATED_COLUMNS:
+                    required, expression = MIGRATED_COLUMNS[(table.name, column.name)]
+                    if legacy_columns.issuperset(required):
+                        targets.append(column.name)
+                        sources.append(expression)
+            conn.exec_driver_sql(
+                f'INSERT OR IGNORE INTO {table.name} ({", ".join(targets)}) '
+                f'SELECT {", ".join(sources)} FROM {legacy}'
+            )
+            conn.exec_driver_sql(f'DROP TABLE {legacy}')
+            logger.info(f"Migrated {table.name} to schema version {SCHEMA_VERSION}")
+
+def _ensure_indexes(engine):
+    """Create indexes on tables that predate them (create_all skips existing tables)."""
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+_MISSING = object()
+
+class LRUCache:
+    """Small thread-safe LRU mapping used to memoize per-user reads.
+    
+    Every invalidation bumps one cache-wide generation. A reader takes
+    generation() before querying and hands it to put(), so a result read
+    before a concurrent write can't be cached after that write's pop().
+    """
+    
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+    
+    def generation(self):
+        with self._lock:
+            return self._generation
+    
+    def put(self, key, value, generation):
+        """Cache value unless anything was invalidated since generation was taken."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def update(self, key, func, generation):
+        """Apply a write to the cached value in place of invalidating it.
+        
+        The writer takes generation() before its write. If anything was
+        invalidated or updated since, the cached value may not match the state
+        func expects, so the key is dropped instead. Either way the generation
+        is bumped, so in-flight misses can't cache a pre-write read. Absent
+        keys stay absent.
+        """
+        with self._lock:
+            stale = generation != self._generation
+            self._generation += 1
+            if stale:
+                self._data.pop(key, None)
+            elif key in self._data:
+                self._data[key] = func(self._data[key])
+    
+    def pop(self, key):
+        with self._lock:
+            self._generation += 1
+            self._data.pop(key, None)
 
 class Database:
+    """SQLite-backed store for watchlists, search history and preferences.
+    
+    Reads are cached per instance and only writes made through the same
+    instance invalidate them, so create one Database per process and share
+    it (init_db does this for the app).
+    """
+    
     def __init__(self, db_path='stock_analysis.db'):
         """Initialize database connection and create tables if they don't exist."""
         try:
             self.db_path = db_path
-            self.engine = create_engine(f'sqlite:///{db_path}', echo=False)
-            Base.metadata.create_all(self.engine)
             
-            Session = sessionmaker(bind=self.engine)
-            self.session = Session()
+            if db_path == ':memory:':
+                # Every new connection to :memory: opens its own empty database,
+                # so reads and writes must share the one connection
+                self.write_engine = create_sqlite_engine(db_path, query_only=False, poolclass=StaticPool)
+                self.engine = self.write_engine
+            else:
+                # SQLite allows a single writer at a time, so writes go through a
+                # one-connection engine while reads share a pool of query-only
+                # connections that WAL lets run alongside the writer.
+                self.write_engine = create_sqlite_engine(
+                    db_path, query_only=False, pool_size=1, max_overflow=0
+                )
+                self.engine = create_sqlite_engine(
+                    db_path, query_only=True, pool_size=8, max_overflow=4
+                )
+            
+            ensure_schema(self.write_engine)
+            
+            # Reads bypass the ORM (see _read_rows), so only writes get a session.
+            # Nothing reads ORM instances after a commit, so skip expiring them;
+            # statements are executed explicitly, so skip the implicit flush too
+            self.WriteSession = scoped_session(sessionmaker(
+                bind=self.write_engine, expire_on_commit=False, autoflush=False
+            ))
+            self._prepare_statements()
+            self._warm_cache()
+            
+            # Preferences and watchlists are read on every page but rarely
+            # written; entries are dropped only by writes through this instance
+            self._prefs_cache = LRUCache()
+            self._watchlist_cache = LRUCache()
+            # Recent searches change on every search, so writes through this
+            # instance update the cached list in place instead of dropping it
+            self._recent_cache = LRUCache()
             
             logger.info("Database initialized successfully")
             
@@ -57,58 +371,151 @@ class Database:
             logger.error(f"Database initialization failed: {e}")
             raise
     
+    def _prepare_statements(self):
+        """Build the per-call statements once; callers only supply bind values.
+        
+        Reusing the same constructs keeps SQLAlchemy on its compiled cache and
+        lets pysqlite reuse the prepared sqlite3 statement across calls.
+        """
+        # Inserts target the Table, not the mapped class, so they run as plain
+        # Core statements and the result keeps its rowcount
+        self._add_to_watchlist_stmt = sqlite_insert(Watchlist.__table__).values(
+            user_id=bindparam('uid'), ticker=bindparam('ticker')
+        ).on_conflict_do_nothing(index_elements=['user_id', 'ticker'])
+        
+        self._remove_from_watchlist_stmt = delete(Watchlist.__table__).where(
+            Watchlist.user_id == bindparam('uid'),
+            Watchlist.ticker == bindparam('ticker')
+        )
+        
+        # Re-searching a ticker moves it to the front by refreshing searched_at
+        add_search = sqlite_insert(SearchHistory.__table__).values(
+            user_id=bindparam('uid'), ticker=bindparam('ticker')
+        )
+        self._add_search_stmt = add_search.on_conflict_do_update(
+            index_elements=['user_id', 'ticker'],
+            set_={'searched_at': add_search.excluded.searched_at}
+        )
+        
+        recent_tickers = select(SearchHistory.ticker).where(
+            SearchHistory.user_id == bindparam('uid')
+        ).order_by(SearchHistory.searched_at.desc()).limit(SEARCH_HISTORY_LIMIT)
+        self._trim_search_history_stmt = delete(SearchHistory).where(
+            SearchHistory.user_id == bindparam('uid'),
+            SearchHistory.ticker.notin_(recent_tickers)
+        )
+    
+    def _read_rows(self, sql, params):
+        """Run a read on a pooled query-only connection through the raw DBAPI.
+        
+        Skips SQLAlchemy's result processing entirely; sqlite3 keeps the
+        prepared statement in its per-connection cache, so repeat calls with
+        the same SQL string skip parsing as well.
+        """
+        conn = self.engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            # Returns the connection to the pool rather than closing it
+            conn.close()
+    
+    def _warm_cache(self):
+        """Scan the per-user tables once so their pages start out in the OS cache."""
+        for table in ('watchlists', 'user_preferences'):
+            self._read_rows(f'SELECT COUNT(*) FROM {table}', ())
+    
     def add_to_watchlist(self, user_id, ticker):
         """Add a ticker to user's watchlist if it doesn't already exist."""
         try:
-            # Check if ticker already exists in watchlist
-            existing = self.session.query(Watchlist).filter_by(
-                user_id=user_id, ticker=ticker
-            ).first()
-            
-            if not existing:
-                watchlist_item = Watchlist(user_id=user_id, ticker=ticker)
-                self.session.add(watchlist_item)
-                self.session.commit()
-                logger.info(f"Added {ticker} to watchlist for user {user_id}")
-                return True
-            else:
-                logger.info(f"{ticker} already in watchlist for user {user_id}")
-                return False
+            with self.WriteSession() as session:
+                # The (user_id, ticker) primary key turns a duplicate into a no-op
+                result = session.execute(
+                    self._add_to_watchlist_stmt, {'uid': user_id, 'ticker': ticker}
+                )
+                session.commit()
+                self._watchlist_cache.pop(user_id)
+                
+                if result.rowcount:
+                    logger.info(f"Added {ticker} to watchlist for user {user_id}")
+                    return True
+                else:
+                    logger.info(f"{ticker} already in watchlist for user {user_id}")
+                    return False
                 
         except Exception as e:
             logger.error(f"Error adding to watchlist: {e}")
-            self.session.rollback()
             return False
     
+    def add_many_to_watchlist(self, user_id, tickers):
+        """Add several tickers to user's watchlist in a single transaction.
+        
+        Prefer this over repeated add_to_watchlist calls when importing a
+        list: it costs one multi-row INSERT and one commit. Tickers are
+        timestamped in the order given, exactly as separate calls would be.
+        Returns the number of tickers that were not already in the watchlist.
+        """
+        if not tickers:
+            return 0
+        
+        try:
+            with self.WriteSession() as session, session.begin():
+                # Distinct, increasing timestamps keep the batch in insertion order
+                now = datetime.utcnow()
+                stmt = sqlite_insert(Watchlist).values([
+                    {
+                        'user_id': user_id,
+                        'ticker': ticker,
+                        'added_at': now + timedelta(microseconds=offset)
+                    }
+                    for offset, ticker in enumerate(tickers)
+                ]).on_conflict_do_nothing(index_elements=['user_id', 'ticker'])
+                added = session.execute(stmt).rowcount
+            self._watchlist_cache.pop(user_id)
+            
+            logger.info(f"Added {added} tickers to watchlist for user {user_id}")
+            return added
+            
+        except Exception as e:
+            logger.error(f"Error adding to watchlist: {e}")
+            return 0
+    
     def remove_from_watchlist(self, user_id, ticker):
         """Remove a ticker from user's watchlist."""
         try:
-            watchlist_item = self.session.query(Watchlist).filter_by(
-                user_id=user_id, ticker=ticker
-            ).first()
-            
-            if watchlist_item:
-                self.session.delete(watchlist_item)
-                self.session.commit()
-                logger.info(f"Removed {ticker} from watchlist for user {user_id}")
-                return True
-            else:
-                logger.info(f"{ticker} not found in watchlist for user {user_id}")
-                return False
+            with self.WriteSession() as session:
+                deleted = session.execute(
+                    self._remove_from_watchlist_stmt, {'uid': user_id, 'ticker': ticker}
+                ).rowcount
+                session.commit()
+                
+                if deleted:
+                    self._watchlist_cache.pop(user_id)
+                    logger.info(f"Removed {ticker} from watchlist for user {user_id}")
+                    return True
+                else:
+                    logger.info(f"{ticker} not found in watchlist for user {user_id}")
+                    return False
                 
         except Exception as e:
             logger.error(f"Error removing from watchlist: {e}")
-            self.session.rollback()
             return False
     
     def get_watchlist(self, user_id):
         """Get user's watchlist."""
+        cached = self._watchlist_cache.get(user_id)
+        if cached is not _MISSING:
+            return list(cached)
+        
         try:
-            watchlist_items = self.session.query(Watchlist).filter_by(
-                user_id=user_id
-            ).order_by(Watchlist.added_at.desc()).all()
-            
-            return [item.ticker for item in watchlist_items]
+            generation = self._watchlist_cache.generation()
+            tickers = [row[0] for row in self._read_rows(WATCHLIST_SQL, (user_id,))]
+            self._watchlist_cache.put(user_id, tuple(tickers), generation)
+            return list(tickers)
             
         except Exception as e:
             logger.error(f"Error getting watchlist: {e}")
@@ -117,39 +524,88 @@ class Database:
     def add_to_search_history(self, user_id, ticker):
         """Add a ticker to search history."""
         try:
-            # Remove existing entry for this ticker to avoid duplicates
-            self.session.query(SearchHistory).filter_by(
-                user_id=user_id, ticker=ticker
-            ).delete()
-            
-            # Add new entry
-            search_item = SearchHistory(user_id=user_id, ticker=ticker)
-            self.session.add(search_item)
+            generation = self._recent_cache.generation()
+            with self.WriteSession() as session, session.begin():
+                session.execute(self._add_search_stmt, {'uid': user_id, 'ticker': ticker})
+                self._trim_search_history(session, user_id)
             
-            # Keep only the 6 most recent searches
-            recent_searches = self.session.query(SearchHistory).filter_by(
-                user_id=user_id
-            ).order_by(SearchHistory.searched_at.desc()).all()
+            # Mirror the move-to-front and cap on the cached list, if any
+            self._recent_cache.update(user_id, lambda recent: (
+                (ticker,) + tuple(t for t in recent if t != ticker)
+            )[:SEARCH_HISTORY_LIMIT], generation)
+            logger.info(f"Added {ticker} to search history for user {user_id}")
             
-            if len(recent_searches) > 6:
-                for old_search in recent_searches[6:]:
-                    self.session.delete(old_search)
+        except Exception as e:
+            logger.error(f"Error adding to search history: {e}")
+    
+    def bulk_add_search_history(self, rows):
+        """Load many ``(user_id, ticker, searched_at)`` searches in one transaction.
+        
+        Meant for backfills and imports: rows go straight to sqlite3's
+        executemany in BULK_INSERT_CHUNK_SIZE slices under a single
+        BEGIN/COMMIT, so the cost is one commit for the whole load. Re-searched
+        tickers keep their newest timestamp and every affected user is trimmed
+        to the most recent searches afterwards. ``searched_at`` may be a naive
+        UTC or timezone-aware ``datetime``, a ``date``, or an ISO 8601 string.
+        Returns the number of rows read.
+        """
+        conn = None
+        try:
+            conn = self.write_engine.raw_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute('BEGIN')
+                user_ids = set()
+                count = 0
+                rows = iter(rows)
+                while True:
+                    chunk = [
+                        (user_id, ticker, format_timestamp(searched_at))
+                        for user_id, ticker, searched_at
+                        in itertools.islice(rows, BULK_INSERT_CHUNK_SIZE)
+                    ]
+                    if not chunk:
+                        break
+                    cursor.executemany(BULK_SEARCH_HISTORY_SQL, chunk)
+                    user_ids.update(row[0] for row in chunk)
+                    count += len(chunk)
+                
+                cursor.executemany(TRIM_SEARCH_HISTORY_SQL, [(uid, uid) for uid in user_ids])
+                conn.commit()
+                # Backfilled timestamps can land anywhere in a user's history
+                for user_id in user_ids:
+                    self._recent_cache.pop(user_id)
+            finally:
+                cursor.close()
             
-            self.session.commit()
-            logger.info(f"Added {ticker} to search history for user {user_id}")
+            logger.info(f"Added {count} searches to search history for {len(user_ids)} users")
+            return count
             
         except Exception as e:
             logger.error(f"Error adding to search history: {e}")
-            self.session.rollback()
+            if conn is not None:
+                conn.rollback()
+            return 0
+        finally:
+            # Returns the connection to the pool rather than closing it
+            if conn is not None:
+                conn.close()
+    
+    def _trim_search_history(self, session, user_id):
+        """Keep only the most recent searches, trimmed in a single DELETE."""
+        session.execute(self._trim_search_history_stmt, {'uid': user_id})
     
     def get_recent_searches(self, user_id):
         """Get user's recent searches (last 6 unique searches)."""
+        cached = self._recent_cache.get(user_id)
+        if cached is not _MISSING:
+            return list(cached)
+        
         try:
-            recent_searches = self.session.query(SearchHistory).filter_by(
-                user_id=user_id
-            ).order_by(SearchHistory.searched_at.desc()).limit(6).all()
-            
-            return [item.ticker for item in recent_searches]
+            generation = self._recent_cache.generation()
+            tickers = [row[0] for row in self._read_rows(RECENT_SEARCHES_SQL, (user_id,))]
+            self._recent_cache.put(user_id, tuple(tickers), generation)
+            return tickers
             
         except Exception as e:
             logger.error(f"Error getting recent searches: {e}")
@@ -157,21 +613,16 @@ class Database:
     
     def get_user_preferences(self, user_id):
         """Get user preferences."""
+        cached = self._prefs_cache.get(user_id)
+        if cached is not _MISSING:
+            return dict(cached) if cached is not None else None
+        
         try:
-            prefs = self.session.query(UserPreferences).filter_by(
-                user_id=user_id
-            ).first()
-            
-            if prefs:
-                return {
-                    'default_ticker': prefs.default_ticker,
-                    'default_period': prefs.default_period,
-                    'theme': prefs.theme,
-                    'show_ma50': prefs.show_ma50,
-                    'show_ma200': prefs.show_ma200
-                }
-            else:
-                return None
+            generation = self._prefs_cache.generation()
+            rows = self._read_rows(PREFERENCES_SQL, (user_id,))
+            prefs = preferences_from_row(rows[0]) if rows else None
+            self._prefs_cache.put(user_id, prefs, generation)
+            return dict(prefs) if prefs is not None else None
                 
         except Exception as e:
             logger.error(f"Error getting user preferences: {e}")
@@ -180,46 +631,134 @@ class Database:
     def update_user_preferences(self, user_id, preferences):
         """Update user preferences."""
         try:
-            prefs = self.session.query(UserPreferences).filter_by(
-                user_id=user_id
-            ).first()
-            
-            if prefs:
-                # Update existing preferences
-                prefs.default_ticker = preferences.get('default_ticker', prefs.default_ticker)
-                prefs.default_period = preferences.get('default_period', prefs.default_period)
-                prefs.theme = preferences.get('theme', prefs.theme)
-                prefs.show_ma50 = preferences.get('show_ma50', prefs.show_ma50)
-                prefs.show_ma200 = preferences.get('show_ma200', prefs.show_ma200)
-            else:
-                # Create new preferences
-                prefs = UserPreferences(
+            with self.WriteSession() as session:
+                values = {
+                    field: preferences[field]
+                    for field in PREFERENCE_COLUMNS if field in preferences
+                }
+                # Only the flag bits the caller passed are overwritten
+                mask = bits = 0
+                for field, flag in PREFERENCE_FLAGS.items():
+                    if field in preferences:
+                        mask |= flag
+                        if preferences[field]:
+                            bits |= flag
+                
+                # Missing fields fall back to column defaults on insert and are
+                # left untouched on update. updated_at is stamped by SQLite on
+                # both paths, since files created before the server default
+                # have no DEFAULT clause on the column.
+                stmt = sqlite_insert(UserPreferences).values(
                     user_id=user_id,
-                    default_ticker=preferences.get('default_ticker', 'AAPL'),
-                    default_period=preferences.get('default_period', '1y'),
-                    theme=preferences.get('theme', 'dark'),
-                    show_ma50=preferences.get('show_ma50', True),
-                    show_ma200=preferences.get('show_ma200', True)
+                    flags=(DEFAULT_PREFERENCE_FLAGS & ~mask) | bits,
+                    updated_at=utc_now(),
+                    **values
                 )
-                self.session.add(prefs)
-            
-            self.session.commit()
-            logger.info(f"Updated preferences for user {user_id}")
-            return True
+                updates = {**values, 'updated_at': utc_now()}
+                if mask:
+                    updates['flags'] = UserPreferences.flags.op('&')(~mask).op('|')(bits)
+                stmt = stmt.on_conflict_do_update(index_elements=['user_id'], set_=updates)
+                session.execute(stmt)
+                session.commit()
+                self._prefs_cache.pop(user_id)
+                logger.info(f"Updated preferences for user {user_id}")
+                return True
             
         except Exception as e:
             logger.error(f"Error updating user preferences: {e}")
-            self.session.rollback()
             return False
     
     def close(self):
-        """Close database connection."""
+        """Close database connections."""
         try:
-            self.session.close()
+            self.WriteSession.remove()
+            self.engine.dispose()
+            if self.write_engine is not self.engine:
+                self.write_engine.dispose()
             logger.info("Database connection closed")
         except Exception as e:
             logger.error(f"Error closing database: {e}")
 
+class AsyncDatabase:
+    """Read-side counterpart of Database for asyncio front-ends.
+    
+    Keeps a pool of warm aiosqlite connections so concurrent requests neither
+    queue behind one session nor pay a fresh connect each time. Writes stay on
+    Database and its single writer connection; this class does not cache, so
+    it always sees writes made by other processes or Database instances.
+    
+    Requires the optional ``aiosqlite`` and ``aiosqlitepool`` packages.
+    """
+    
+    def __init__(self, db_path='stock_analysis.db', pool_size=8):
+        if aiosqlite is None or SQLiteConnectionPool is None:
+            raise ImportError("AsyncDatabase requires the aiosqlite and aiosqlitepool packages")
+        if db_path == ':memory:':
+            # Each pooled connection would open its own empty database
+            raise ValueError("AsyncDatabase needs a database file, not ':memory:'")
+        
+        try:
+            self.db_path = db_path
+            # On an up-to-date file this is a single PRAGMA read; the writer
+            # engine is only needed for it, so it is not kept around
+            schema_engine = create_sqlite_engine(db_path, query_only=False, poolclass=NullPool)
+            try:
+                ensure_schema(schema_engine)
+            finally:
+                schema_engine.dispose()
+            self.pool = SQLiteConnectionPool(self._connect, pool_size=pool_size)
+            logger.info("Async database pool initialized successfully")
+            
+        except Exception as e:
+            logger.error(f"Async database initialization failed: {e}")
+            raise
+    
+    async def _connect(self):
+        """Open a query-only connection with the same PRAGMAs as Database uses."""
+        conn = await aiosqlite.connect(self.db_path)
+        for pragma in SQLITE_PRAGMAS:
+            await conn.execute(pragma)
+        await conn.execute('PRAGMA query_only=true')
+        return conn
+    
+    async def _read_rows(self, sql, params):
+        async with self.pool.connection() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+    
+    async def get_watchlist(self, user_id):
+        """Get user's watchlist."""
+        try:
+            return [row[0] for row in await self._read_rows(WATCHLIST_SQL, (user_id,))]
+        except Exception as e:
+            logger.error(f"Error getting watchlist: {e}")
+            return []
+    
+    async def get_recent_searches(self, user_id):
+        """Get user's recent searches (last 6 unique searches)."""
+        try:
+            return [row[0] for row in await self._read_rows(RECENT_SEARCHES_SQL, (user_id,))]
+        except Exception as e:
+            logger.error(f"Error getting recent searches: {e}")
+            return []
+    
+    async def get_user_preferences(self, user_id):
+        """Get user preferences."""
+        try:
+            rows = await self._read_rows(PREFERENCES_SQL, (user_id,))
+            return preferences_from_row(rows[0]) if rows else None
+        except Exception as e:
+            logger.error(f"Error getting user preferences: {e}")
+            return None
+    
+    async def close(self):
+        """Close all pooled connections."""
+        try:
+            await self.pool.close()
+            logger.info("Async database pool closed")
+        except Exception as e:
+            logger.error(f"Error closing async database: {e}")
+
 def init_db():
     """Initialize database with default data if needed."""
     try:
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from database import SCHEMA_VERSION, Database
+
+# Tables exactly as the original surrogate-id models created them
+BASELINE_SCHEMA = """
+CREATE TABLE watchlists (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    ticker VARCHAR(10) NOT NULL,
+    added_at DATETIME,
+    PRIMARY KEY (id)
+);
+CREATE TABLE search_history (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    ticker VARCHAR(10) NOT NULL,
+    searched_at DATETIME,
+    PRIMARY KEY (id)
+);
+CREATE TABLE user_preferences (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    default_ticker VARCHAR(10),
+    default_period VARCHAR(10),
+    theme VARCHAR(10),
+    show_ma50 BOOLEAN,
+    show_ma200 BOOLEAN,
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    UNIQUE (user_id)
+);
+"""
+
+
+class LegacyMigrationTest(unittest.TestCase):
+    """Opening a file written by the original schema must keep its data."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'legacy.db')
+
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(BASELINE_SCHEMA)
+        conn.executemany(
+            "INSERT INTO watchlists (id, user_id, ticker, added_at) VALUES (?, ?, ?, ?)",
+            [
+                (1, 1, 'AAPL', '2024-01-01 10:00:00.000000'),
+                (2, 1, 'MSFT', '2024-01-02 10:00:00.000000'),
+                (3, 2, 'TSLA', '2024-01-03 10:00:00.000000'),
+            ]
+        )
+        conn.executemany(
+            "INSERT INTO search_history (id, user_id, ticker, searched_at) VALUES (?, ?, ?, ?)",
+            [
+                (1, 1, 'NVDA', '2024-02-01 10:00:00.000000'),
+                (2, 1, 'AMZN', '2024-02-02 10:00:00.000000'),
+            ]
+        )
+        conn.executemany(
+            "INSERT INTO user_preferences (id, user_id, default_ticker, default_period, "
+            "theme, show_ma50, show_ma200, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (1, 1, 'MSFT', '5y', 'light', 0, 1, '2024-03-01 10:00:00.000000'),
+                (2, 2, 'AAPL', '1y', 'dark', None, None, '2024-03-02 10:00:00.000000'),
+            ]
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_data_survives_migration(self):
+        db = Database(self.db_path)
+        try:
+            self.assertEqual(db.get_watchlist(1), ['MSFT', 'AAPL'])
+            self.assertEqual(db.get_watchlist(2), ['TSLA'])
+            self.assertEqual(db.get_recent_searches(1), ['AMZN', 'NVDA'])
+            self.assertEqual(db.get_user_preferences(1), {
+                'default_ticker': 'MSFT',
+                'default_period': '5y',
+                'theme': 'light',
+                'show_ma50': False,
+                'show_ma200': True,
+            })
+            # Unset legacy toggles fall back to the column default (both on)
+            prefs = db.get_user_preferences(2)
+            self.assertTrue(prefs['show_ma50'])
+            self.assertTrue(prefs['show_ma200'])
+        finally:
+            db.close()
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(watchlists)")}
+            self.assertNotIn('id', columns)
+            flags = conn.execute(
+                "SELECT user_id, flags FROM user_preferences ORDER BY user_id"
+            ).fetchall()
+            self.assertEqual(flags, [(1, 0b10), (2, 0b11)])
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            self.assertEqual(version, SCHEMA_VERSION)
+        finally:
+            conn.close()
+
+    def test_migrated_tables_accept_writes(self):
+        db = Database(self.db_path)
+        try:
+            self.assertFalse(db.add_to_watchlist(1, 'AAPL'))
+            self.assertTrue(db.add_to_watchlist(1, 'GOOGL'))
+            db.add_to_search_history(1, 'NVDA')
+            self.assertEqual(db.get_recent_searches(1), ['NVDA', 'AMZN'])
+            self.assertTrue(db.update_user_preferences(1, {'show_ma50': True}))
+            prefs = db.get_user_preferences(1)
+            self.assertTrue(prefs['show_ma50'])
+            self.assertTrue(prefs['show_ma200'])
+        finally:
+            db.close()
+
+    def test_newer_schema_is_left_alone(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION + 1}")
+        conn.close()
+
+        with self.assertLogs('database', level='WARNING'):
+            Database(self.db_path).close()
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(watchlists)")}
+            self.assertIn('id', columns)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            self.assertEqual(version, SCHEMA_VERSION + 1)
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()